@@ -8,18 +8,10 @@ set -e
 # Configuration
 REPO_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 BREWFILE_JSON="$REPO_DIR/home/.config/brewfile.json"
+export APT_REFRESH="${APT_REFRESH:-}"
 
-# Colors
-BLUE='\033[1;34m'
-GREEN='\033[1;32m'
-YELLOW='\033[1;33m'
-RED='\033[1;31m'
-RESET='\033[0m'
-
-say() { echo -e "${BLUE}===>${RESET} $1"; }
-success() { echo -e "${GREEN}[success]${RESET} $1"; }
-warn() { echo -e "${YELLOW}[warn]${RESET} $1"; }
-error() { echo -e "${RED}[error]${RESET} $1" >&2; }
+# Shared output and package helpers
+source "$REPO_DIR/lib/common.sh"
 
 # --- Shared Setup ---
 install_tpm() {
@@ -35,7 +27,16 @@ install_tpm() {
 install_homebrew() {
     if ! command -v brew >/dev/null 2>&1; then
         say "Installing Homebrew..."
-        /bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"
+        # Download the installer to a file first so a failed download stops here
+        local installer
+        installer="$(mktemp)"
+        if ! curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh -o "$installer"; then
+            rm -f "$installer"
+            error "Failed to download the Homebrew installer"
+            exit 1
+        fi
+        /bin/bash "$installer" || { rm -f "$installer"; exit 1; }
+        rm -f "$installer"
 
         # Add brew to path for immediate use
         if [[ -f /opt/homebrew/bin/brew ]]; then
@@ -53,16 +54,19 @@ setup_macos() {
 
     install_homebrew
 
+    # Let brew and brewfile download bottles in parallel unless the user chose a value
+    export HOMEBREW_DOWNLOAD_CONCURRENCY="${HOMEBREW_DOWNLOAD_CONCURRENCY:-auto}"
+
     say "Installing foundational tools..."
-    brew install mas
+    local tools=(mas)
 
-    # Install brewfile tool
+    # The fully qualified name taps waltermwaniki/brewfile as part of the install
     if ! command -v brewfile >/dev/null 2>&1; then
-        say "Installing brewfile tool..."
-        brew tap waltermwaniki/brewfile
-        brew install brewfile
+        tools+=(waltermwaniki/brewfile/brewfile)
     fi
 
+    brew install "${tools[@]}"
+
     # Run Dotty
     say "Setting up dotfiles..."
     "$REPO_DIR/dotty" install
@@ -81,27 +85,52 @@ setup_macos() {
 }
 
 # --- Linux Setup ---
+# List installed packages with a single query against the package database
+installed_linux_packages() {
+    if command -v dpkg-query >/dev/null 2>&1; then
+        # Only count fully installed packages, not removed ones with leftover config files
+        dpkg-query -W -f='${Status} ${Package}\n' 2>/dev/null | awk '$3 == "installed" { print $4 }'
+    elif command -v rpm >/dev/null 2>&1; then
+        rpm -qa --qf '%{NAME}\n'
+    fi
+}
+
+# Print the given packages that are not installed yet
+missing_linux_packages() {
+    local installed pkg
+    installed=$'\n'"$(installed_linux_packages)"$'\n'
+    for pkg in "$@"; do
+        [[ "$installed" == *$'\n'"$pkg"$'\n'* ]] || echo "$pkg"
+    done
+}
+
 install_linux_packages() {
     say "Installing core tools for Linux..."
 
     local packages="zsh tmux neovim fzf ripgrep bat tree curl git nodejs npm"
+    local missing
     # 'fd' is often 'fd-find' on Debian/Ubuntu
 
     if [ -f /etc/os-release ]; then
         . /etc/os-release
         if [[ "$ID" == "ubuntu" || "$ID" == "debian" || "$ID_LIKE" == *"debian"* ]]; then
-            sudo apt-get update
-            sudo apt-get install -y $packages fd-find zsh-autosuggestions zsh-syntax-highlighting
+            missing=$(missing_linux_packages $packages fd-find zsh-autosuggestions zsh-syntax-highlighting)
+            if [ -n "$missing" ]; then
+                apt_update
+                apt_install $missing
+            else
+                success "Core tools already installed"
+            fi
 
             # Install GitHub CLI (gh) if missing
             if ! command -v gh >/dev/null 2>&1; then
                 say "Installing GitHub CLI..."
-                type -p curl >/dev/null || (sudo apt update && sudo apt install curl -y)
+                type -p curl >/dev/null || (apt_update && apt_install curl)
                 curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg | sudo dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg \
                 && sudo chmod go+r /usr/share/keyrings/githubcli-archive-keyring.gpg \
                 && echo "deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg] https://cli.github.com/packages stable main" | sudo tee /etc/apt/sources.list.d/github-cli.list > /dev/null \
-                && sudo apt update \
-                && sudo apt install gh -y
+                && sudo apt-get update -o Dir::Etc::sourcelist=sources.list.d/github-cli.list -o Dir::Etc::sourceparts=- -o APT::Get::List-Cleanup=0 \
+                && apt_install gh
             fi
 
             # Symlink fdfind to fd if needed
@@ -110,8 +139,13 @@ install_linux_packages() {
                  ln -sf $(which fdfind) ~/.local/bin/fd
             fi
         elif [[ "$ID" == "rocky" || "$ID" == "rhel" || "$ID" == "centos" || "$ID_LIKE" == *"rhel"* ]]; then
-            sudo dnf install -y epel-release
-            sudo dnf install -y $packages fd-find zsh-autosuggestions zsh-syntax-highlighting gh
+            missing=$(missing_linux_packages $packages fd-find zsh-autosuggestions zsh-syntax-highlighting gh)
+            if [ -n "$missing" ]; then
+                sudo dnf install -y epel-release
+                sudo dnf install -y $missing
+            else
+                success "Core tools already installed"
+            fi
         else
             warn "Unsupported Linux distribution for auto-install: $ID"
             warn "Please manually install: $packages"
@@ -199,6 +233,20 @@ setup_linux() {
 
 # --- Main ---
 main() {
+    local arg
+    for arg in "$@"; do
+        case "$arg" in
+            --refresh)
+                APT_REFRESH=1
+                ;;
+            *)
+                error "Unknown option: $arg"
+                echo "Usage: ./bootstrap.sh [--refresh]"
+                exit 1
+                ;;
+        esac
+    done
+
     if [[ "$OSTYPE" == "darwin"* ]]; then
         setup_macos
     else
@@ -207,7 +255,7 @@ main() {
 
     echo ""
     success "Bootstrap complete!"
-    "$REPO_DIR/dotty" status
+    exec "$REPO_DIR/dotty" status
 }
 
 main "$@"
@@ -0,0 +1,43 @@
+#!/usr/bin/env bash
+
+# common.sh - Output and package helpers shared by dotty and bootstrap.sh
+# Sourced, not executed.
+
+# Colors (disabled when NO_COLOR is set or output is not a terminal)
+if [ -n "${NO_COLOR:-}" ] || [ "${TERM:-}" = "dumb" ] || [ ! -t 1 ]; then
+    BLUE='' GREEN='' YELLOW='' RED='' RESET=''
+else
+    BLUE=$'\033[1;34m'
+    GREEN=$'\033[1;32m'
+    YELLOW=$'\033[1;33m'
+    RED=$'\033[1;31m'
+    RESET=$'\033[0m'
+fi
+
+say() { printf '%s\n' "${BLUE}===>${RESET} $1"; }
+success() { printf '%s\n' "${GREEN}[success]${RESET} $1"; }
+warn() { printf '%s\n' "${YELLOW}[warn]${RESET} $1"; }
+error() { printf '%s\n' "${RED}[error]${RESET} $1" >&2; }
+
+# Refresh apt package lists unless they were updated within the last hour
+# (set APT_REFRESH=1 to force)
+apt_update() {
+    # The directory mtime also changes when the lists are deleted (as Docker
+    # images often do), so only trust it when package indexes are present
+    local indexes=(/var/lib/apt/lists/*_Packages*)
+    if [ -z "${APT_REFRESH:-}" ] && [ -e "${indexes[0]}" ] \
+        && [ -n "$(find /var/lib/apt/lists -maxdepth 0 -mmin -60 2>/dev/null)" ]; then
+        say "apt package lists are fresh, skipping update"
+        return 0
+    fi
+    sudo apt-get update
+}
+
+# Install apt packages, using apt-fast for parallel downloads when available
+apt_install() {
+    if command -v apt-fast >/dev/null 2>&1; then
+        sudo apt-fast install -y "$@"
+    else
+        sudo apt-get install -y "$@"
+    fi
+}